@@ -1,16 +1,49 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from sse_starlette import EventSourceResponse, ServerSentEvent
 import asyncio
-from portugueseradios import available_radios
+import os
+import threading
+from logging import getLogger
+from time import perf_counter
+from typing import Optional
+from portugueseradios import (
+    ArtworkCache,
+    BatchPoller,
+    PlayStats,
+    available_radios,
+    load_snapshot,
+    save_snapshot,
+)
+
+logger = getLogger(__name__)
 
 app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-radios = available_radios()
+SNAPSHOT_PATH = os.environ.get("RADIOS_SNAPSHOT", "snapshot.json")
+ARTWORK_DIR = os.environ.get("RADIOS_ARTWORK", "artwork")
+# Seconds between snapshot writes while updates keep coming
+SNAPSHOT_INTERVAL = 30
+# How long a thumbnail may take to earn its card a second update
+ARTWORK_TIMEOUT = 30
+
+stats = PlayStats()
+# Created on startup, so importing the app does not touch the disk
+artwork: Optional[ArtworkCache] = None
+radios = available_radios(stats)
 radio_indices = {radio.name: n for n, radio in enumerate(radios)}
+updates: asyncio.Queue = asyncio.Queue()
+poller = BatchPoller(radios, 10, updates)
+_background: list[asyncio.Task] = []
+_artwork_updates: set[asyncio.Task] = set()
+_snapshot_due = asyncio.Event()
+# Keeps a write from a worker thread and the one on shutdown apart
+_snapshot_lock = threading.Lock()
+publisher = {"published": 0, "errors": 0, "last_error": None}
 
 
 class Stream:
@@ -45,11 +78,56 @@ async def index(request: Request):
 async def radio_html(radio_name: str, request: Request):
     radio = radios[radio_indices[radio_name]]
 
-    context = {"request": request, "radio_name": radio_name, "song": radio.current_song}
+    song = radio.current_song
+    image_url = song.image_url if song is not None else ""
+    cached = artwork.lookup(image_url) if artwork is not None else None
+    if cached is not None:
+        image_url = request.url_for("artwork_file", name=cached).path
+
+    context = {
+        "request": request,
+        "radio_name": radio_name,
+        "song": song,
+        "image_url": image_url,
+    }
 
     return templates.TemplateResponse("song.html", context)
 
 
+@app.get("/radio/{radio_name}/recent")
+async def radio_recent(radio_name: str, limit: int = 50):
+    if radio_name not in radio_indices:
+        raise HTTPException(status_code=404)
+    radio = radios[radio_indices[radio_name]]
+    return radio.history.recent(limit)
+
+
+@app.get("/artwork/{name}", name="artwork_file")
+async def artwork_file(name: str):
+    path = artwork.path(name) if artwork is not None else None
+    if path is None:
+        raise HTTPException(status_code=404)
+    return FileResponse(
+        path,
+        media_type="image/webp",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
+@app.get("/api/pollers")
+async def api_pollers():
+    running = bool(_background) and not _background[0].done()
+    return {
+        "stations": poller.status(),
+        "publisher": {**publisher, "running": running},
+    }
+
+
+@app.get("/api/stats")
+async def api_stats():
+    return stats.snapshot()
+
+
 @app.get("/radio_stream")
 async def listen_update(request: Request):
     print(
@@ -64,18 +142,93 @@ async def listen_update(request: Request):
     return EventSourceResponse(stream)
 
 
-async def poll_radios():
-    queue = asyncio.Queue()
-    for radio in radios:
-        asyncio.create_task(radio.poll(10, queue))
+async def _broadcast(radio) -> None:
+    event = ServerSentEvent(data=radio.name, event=f"update_{radio.name}")
+    for stream in _streams:
+        await stream.asend(event)
+
+
+async def _update_artwork(radio, url: str, done: asyncio.Event) -> None:
+    """Updates the card of `radio` again once the thumbnail of `url` is ready,
+    unless the song has changed in the meantime"""
+    try:
+        await asyncio.wait_for(done.wait(), ARTWORK_TIMEOUT)
+    except asyncio.TimeoutError:
+        return
+    song = radio.current_song
+    if song is not None and song.image_url == url and artwork.lookup(url):
+        await _broadcast(radio)
+
+
+def _write_snapshot() -> None:
+    with _snapshot_lock:
+        save_snapshot(radios, SNAPSHOT_PATH)
+
+
+async def save_snapshots():
+    """Writes the snapshot after an update, at most once per
+    `SNAPSHOT_INTERVAL` and off the event loop"""
     while True:
-        radio = await queue.get()
-        queue.task_done()
-        event = ServerSentEvent(data=radio.name, event=f"update_{radio.name}")
-        for stream in _streams:
-            await stream.asend(event)
+        await _snapshot_due.wait()
+        _snapshot_due.clear()
+        try:
+            await asyncio.to_thread(_write_snapshot)
+        except OSError:
+            logger.exception("Could not save snapshot to %s", SNAPSHOT_PATH)
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+
+async def publish_updates():
+    while True:
+        radio = await updates.get()
+        start = perf_counter()
+        try:
+            _snapshot_due.set()
+            await _broadcast(radio)
+            publisher["published"] += 1
+
+            # The card goes out with the original image, and again with the
+            # thumbnail once the download started by `Radio.fetch` is done
+            song = radio.current_song
+            done = artwork.submit(song.image_url) if song is not None else None
+            if done is not None:
+                task = asyncio.create_task(
+                    _update_artwork(radio, song.image_url, done)
+                )
+                _artwork_updates.add(task)
+                task.add_done_callback(_artwork_updates.discard)
+        except Exception as error:  # pylint: disable=broad-except
+            # A failed update must not stop the updates that follow it
+            logger.exception("Could not publish update for %s", radio.name)
+            publisher["errors"] += 1
+            publisher["last_error"] = repr(error)
+        finally:
+            radio.timings.record("publish", perf_counter() - start)
+            updates.task_done()
 
 
 @app.on_event("startup")
 async def app_startup():
-    asyncio.create_task(poll_radios())
+    global artwork
+    load_snapshot(radios, SNAPSHOT_PATH)
+    artwork = ArtworkCache(ARTWORK_DIR)
+    artwork.start()
+    for radio in radios:
+        radio.artwork = artwork
+        if radio.current_song is not None:
+            artwork.submit(radio.current_song.image_url)
+    poller.start()
+    _background.append(asyncio.create_task(publish_updates()))
+    _background.append(asyncio.create_task(save_snapshots()))
+
+
+@app.on_event("shutdown")
+async def app_shutdown():
+    await poller.stop()
+    for task in [*_background, *_artwork_updates]:
+        task.cancel()
+    await asyncio.gather(*_background, *_artwork_updates, return_exceptions=True)
+    if artwork is not None:
+        await artwork.stop()
+    # Waits for a write still running in its thread, then saves the last state
+    _write_snapshot()
@@ -0,0 +1,123 @@
+""" Compares one polling task per radio with the batched single-timer poller
+
+Run from the repository root:
+
+    python -m benchmarks.polling --interval 2 --duration 20
+
+Each simulated radio answers after a random delay of up to `--latency`
+seconds and never changes song, so only the scheduling cost is measured.
+Wakeups are event loop iterations and timers are calls to `loop.call_at`;
+all figures are scaled to one minute of run time. The batched poller gets
+in-flight caps as large as the number of radios, so both engines can
+keep up with the interval.
+"""
+
+from argparse import ArgumentParser
+import asyncio
+import random
+import time
+
+from portugueseradios.fetch_radio import Song
+from portugueseradios.radio import Radio
+from portugueseradios.scheduler import BatchPoller
+from portugueseradios.supervisor import Supervisor
+
+
+class CountingLoop(asyncio.SelectorEventLoop):
+    """Event loop counting how many times it wakes up"""
+
+    wakeups = 0
+    timers = 0
+
+    def _run_once(self):
+        self.wakeups += 1
+        super()._run_once()
+
+    def call_at(self, when, callback, *args, context=None):
+        self.timers += 1
+        return super().call_at(when, callback, *args, context=context)
+
+
+def simulated_radios(count: int, latency: float) -> list[Radio]:
+    def fetcher():
+        song = Song("Title", "Artist")
+
+        async def fetch():
+            await asyncio.sleep(random.uniform(0, latency))
+            return song
+
+        return fetch
+
+    return [
+        Radio(
+            f"radio{n}",
+            "",
+            "",
+            fetcher(),
+            last_song=Song("Title", "Artist"),
+            host=f"host{n % 8}",
+        )
+        for n in range(count)
+    ]
+
+
+async def run(
+    engine: str, count: int, interval: float, duration: float, latency: float
+):
+    radios = simulated_radios(count, latency)
+    queue: asyncio.Queue = asyncio.Queue()
+    if engine == "tasks":
+        poller = Supervisor(radios, interval, queue)
+    else:
+        poller = BatchPoller(
+            radios,
+            interval,
+            queue,
+            tick=interval / 10,
+            max_in_flight=count,
+            max_per_host=count,
+        )
+
+    loop = asyncio.get_running_loop()
+    poller.start()
+    # Skip the start-up burst, where every radio is polled at once
+    await asyncio.sleep(interval)
+    cycles = sum(radio.timings.cycles for radio in radios)
+    wakeups, timers, cpu = loop.wakeups, loop.timers, time.process_time()
+    await asyncio.sleep(duration)
+    cycles = sum(radio.timings.cycles for radio in radios) - cycles
+    wakeups, timers = loop.wakeups - wakeups, loop.timers - timers
+    cpu = time.process_time() - cpu
+    await poller.stop()
+    return cycles, wakeups, timers, cpu
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=2)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--radios", type=int, nargs="+", default=[12, 100, 1000])
+    args = parser.parse_args()
+
+    scale = 60 / args.duration
+    print(
+        f"{'radios':>7} {'engine':>7} {'polls/min':>10} "
+        f"{'wakeups/min':>12} {'timers/min':>11} {'cpu s/min':>10}"
+    )
+    for count in args.radios:
+        for engine in ("tasks", "batch"):
+            loop = CountingLoop()
+            cycles, wakeups, timers, cpu = loop.run_until_complete(
+                run(engine, count, args.interval, args.duration, args.latency)
+            )
+            loop.close()
+            print(
+                f"{count:>7} {engine:>7} {cycles * scale:>10.0f} "
+                f"{wakeups * scale:>12.0f} {timers * scale:>11.0f} "
+                f"{cpu * scale:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
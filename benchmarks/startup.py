@@ -0,0 +1,127 @@
+""" Measures import time and time to the first song shown after a cold start
+
+Run from the repository root, optionally against another checkout:
+
+    python -m benchmarks.startup --root . --snapshot snapshot.json
+
+Import times are the cumulative `-X importtime` figures of the package
+and of the app, the median of `--runs` fresh interpreters after one
+warm-up run. Time to first meaningful response starts when uvicorn is
+launched and ends when `/radio/<station>` renders a card with a song
+title; cards without a song come back too, but do not count. Without a
+snapshot the first song waits for the upstream feeds and Spotify.
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from urllib.error import URLError
+from urllib.request import urlopen
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+SONG_TITLE = re.compile(r'<h2 class="card-title[^"]*"[^>]*>\s*[^<\s]')
+
+
+def import_time(root: str, statement: str, module: str, runs: int) -> float:
+    """Median cumulative import time of `module`, in milliseconds"""
+    times = []
+    for _ in range(runs + 1):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                times.append(int(fields[1]) / 1000)
+    # The first run also compiles the bytecode
+    return median(times[1:])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_response(root: str, station: str, snapshot: str, timeout: float):
+    """Seconds from launching the app to its first response and to its first
+    card with a song, or None for what did not happen within `timeout`"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/radio/{station}"
+    with TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "RADIOS_SNAPSHOT": str(Path(directory) / "snapshot.json"),
+            "RADIOS_ARTWORK": str(Path(directory) / "artwork"),
+        }
+        if snapshot:
+            shutil.copy(snapshot, env["RADIOS_SNAPSHOT"])
+
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+            cwd=root,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        responded = None
+        try:
+            while time.perf_counter() - start < timeout:
+                try:
+                    with urlopen(url, timeout=1) as response:
+                        body = response.read().decode()
+                except (URLError, ConnectionError):
+                    time.sleep(0.01)
+                    continue
+                elapsed = time.perf_counter() - start
+                responded = responded or elapsed
+                if SONG_TITLE.search(body):
+                    return responded, elapsed
+                time.sleep(0.05)
+            return responded, None
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def _seconds(value) -> str:
+    return f"{value:.2f} s" if value is not None else "never"
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=".")
+    parser.add_argument("--station", default="M80")
+    parser.add_argument("--snapshot", default="")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    package = import_time(
+        args.root, "import portugueseradios", "portugueseradios", args.runs
+    )
+    app = import_time(args.root, "import app", "app", args.runs)
+    print(f"import portugueseradios  {package:9.2f} ms")
+    print(f"import app               {app:9.2f} ms")
+
+    responded, meaningful = first_response(
+        args.root, args.station, args.snapshot, args.timeout
+    )
+    print(f"first response           {_seconds(responded):>12}")
+    print(f"first song               {_seconds(meaningful):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,26 @@
-from .radio import Radio, available_radios
-from .spotify import SpotifySong
+""" Lazily exposes the public API so importing the package stays cheap """
+
+_exports = {
+    "ArtworkCache": ".artwork",
+    "BatchPoller": ".scheduler",
+    "Radio": ".radio",
+    "available_radios": ".radio",
+    "load_snapshot": ".radio",
+    "save_snapshot": ".radio",
+    "SpotifySong": ".spotify",
+    "PlayStats": ".stats",
+    "track_key": ".normalize",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+
+    value = getattr(import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
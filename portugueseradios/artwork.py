@@ -0,0 +1,179 @@
+""" Local cache of resized album art """
+
+from collections import OrderedDict
+from hashlib import sha256
+from io import BytesIO
+from logging import getLogger
+from pathlib import Path
+from typing import Optional
+import asyncio
+import re
+import time
+
+logger = getLogger(__name__)
+
+FILENAME = re.compile(r"^[0-9a-f]{32}\.webp$")
+
+
+def _thumbnail(data: bytes, size: int) -> bytes:
+    """Resizes an image to fit in a `size` square and encodes it as WebP"""
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        output = BytesIO()
+        image.convert("RGB").save(output, "WEBP", quality=80)
+        return output.getvalue()
+
+
+class ArtworkCache:
+    """Downloads album art once per image URL and keeps a thumbnail on disk
+
+    Thumbnails are named after the hash of their source URL and size, so
+    a file name always means the same image, can be cached forever by
+    clients, and is found again after a restart without downloading
+    anything. A fixed pool of workers does the downloads, and the least
+    recently used files are deleted once the directory grows past
+    `max_bytes`. URLs that could not be downloaded are not tried again for
+    `retry_after` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        size: int = 300,
+        max_bytes: int = 50 * 1024 * 1024,
+        workers: int = 4,
+        retry_after: float = 3600,
+        max_failures: int = 1024,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.retry_after = retry_after
+        self.max_failures = max_failures
+        # When each failed URL last failed, oldest first
+        self._failures: OrderedDict[str, float] = OrderedDict()
+        self._pending: dict[str, asyncio.Event] = {}
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=256)
+        self._tasks: list[asyncio.Task] = []
+        self._files: OrderedDict[str, int] = OrderedDict()
+        self._total = 0
+
+        files = sorted(
+            (path for path in self.directory.iterdir() if FILENAME.match(path.name)),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for path in files:
+            self._files[path.name] = path.stat().st_size
+            self._total += self._files[path.name]
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def _name(self, url: str) -> str:
+        return f"{sha256(f'{self.size}:{url}'.encode()).hexdigest()[:32]}.webp"
+
+    def submit(self, url: str) -> Optional[asyncio.Event]:
+        """Queues `url` for download, unless it is cached or already queued
+
+        Returns an event set once the download has finished or failed, or
+        None if there is nothing to wait for, as when `url` failed recently.
+        """
+        if not url or self._name(url) in self._files:
+            return None
+        failed = self._failures.get(url)
+        if failed is not None:
+            if time.monotonic() - failed < self.retry_after:
+                return None
+            del self._failures[url]
+        if url in self._pending:
+            return self._pending[url]
+        try:
+            self._queue.put_nowait(url)
+        except asyncio.QueueFull:
+            logger.warning("Artwork queue full, skipping %s", url)
+            return None
+        self._pending[url] = asyncio.Event()
+        return self._pending[url]
+
+    async def wait(self, url: str, timeout: float) -> Optional[str]:
+        """Queues `url` if needed and waits up to `timeout` seconds for its
+        thumbnail, returning the file name if it is ready"""
+        done = self.submit(url)
+        if done is not None:
+            try:
+                await asyncio.wait_for(done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.lookup(url)
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Returns the cached file name for `url`, if there is one"""
+        name = self._name(url) if url else None
+        if name is None or name not in self._files:
+            return None
+        self._files.move_to_end(name)
+        return name
+
+    def path(self, name: str) -> Optional[Path]:
+        """Returns the path of a cached file, refusing anything else"""
+        if not FILENAME.match(name) or name not in self._files:
+            return None
+        self._files.move_to_end(name)
+        path = self.directory / name
+        # The modification time keeps the LRU order across restarts
+        path.touch()
+        return path
+
+    async def _worker(self) -> None:
+        import aiohttp
+
+        async with aiohttp.ClientSession() as session:
+            while True:
+                url = await self._queue.get()
+                try:
+                    if not await self._store(session, url):
+                        self._failed(url)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Could not cache artwork from %s", url)
+                    self._failed(url)
+                finally:
+                    self._pending.pop(url).set()
+                    self._queue.task_done()
+
+    def _failed(self, url: str) -> None:
+        self._failures[url] = time.monotonic()
+        self._failures.move_to_end(url)
+        while len(self._failures) > self.max_failures:
+            self._failures.popitem(last=False)
+
+    async def _store(self, session, url: str) -> bool:
+        async with session.get(url, timeout=10) as response:
+            if response.status != 200:
+                logger.warning("Artwork %s answered %d", url, response.status)
+                return False
+            data = await response.read()
+
+        thumbnail = await asyncio.to_thread(_thumbnail, data, self.size)
+        name = self._name(url)
+        await asyncio.to_thread((self.directory / name).write_bytes, thumbnail)
+        self._files[name] = len(thumbnail)
+        self._total += len(thumbnail)
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            self._total -= size
+            (self.directory / name).unlink(missing_ok=True)
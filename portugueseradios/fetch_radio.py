@@ -1,14 +1,13 @@
 """ Fetches currently playing song and artist from portuguese radio stations """
 
-from typing import Optional
+from contextvars import ContextVar
+from typing import Optional, TYPE_CHECKING
 from dataclasses import dataclass
+from time import perf_counter
 from xml.parsers.expat import ExpatError
-import requests
 import asyncio
 import json
-import aiohttp
-from bs4 import BeautifulSoup
-import xmltodict
+from .normalize import track_key
 from .urls import (
     URL_ANTENA1,
     URL_ANTENA3,
@@ -25,6 +24,15 @@ from .urls import (
     URL_SMOOTH,
 )
 
+if TYPE_CHECKING:
+    import aiohttp
+
+# Seconds spent waiting on the network, accumulated by `fetch_data_from_url`
+# while a caller has set it
+network_time: ContextVar[Optional[list[float]]] = ContextVar(
+    "network_time", default=None
+)
+
 
 @dataclass
 class Song:
@@ -33,6 +41,11 @@ class Song:
     title: str
     artist: str
 
+    @property
+    def key(self) -> str:
+        """Canonical key identifying the track regardless of spelling"""
+        return track_key(self.title, self.artist)
+
     @classmethod
     def from_dict(
         cls, data: dict["str", "str"], title_key: str, artist_key: str
@@ -49,18 +62,26 @@ class Song:
 
 async def fetch_data_from_url(
     url: str, content_type: str
-) -> Optional[aiohttp.ClientResponse]:
+) -> Optional["aiohttp.ClientResponse"]:
     """Fetches data from a given URL using aiohttp"""
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, timeout=5) as response:
-                return (
-                    await getattr(response, content_type)()
-                    if response.status == 200
-                    else None
-                )
-        except aiohttp.ClientError:
-            return None
+    import aiohttp
+
+    start = perf_counter()
+    try:
+        async with aiohttp.ClientSession() as session:
+            try:
+                async with session.get(url, timeout=5) as response:
+                    return (
+                        await getattr(response, content_type)()
+                        if response.status == 200
+                        else None
+                    )
+            except aiohttp.ClientError:
+                return None
+    finally:
+        elapsed = network_time.get()
+        if elapsed is not None:
+            elapsed[0] += perf_counter() - start
 
 
 async def _fetch_antenax(url: str) -> Optional[Song]:
@@ -91,6 +112,8 @@ async def _fetch_bauer(url: str) -> Optional[Song]:
     """Fetches currently playing song and artist from Bauer Media"""
     result = await fetch_data_from_url(url, "text")
     if result is not None:
+        import xmltodict
+
         try:
             parsed_data = xmltodict.parse(result)
             table = parsed_data.get("RadioInfo", {}).get("Table")
@@ -133,7 +156,7 @@ async def fetch_futura() -> Optional[Song]:
                 artist, title = map(str.strip, playing.split(" - ", maxsplit=1))
                 return Song(title=title, artist=artist)
 
-        except (KeyError, requests.exceptions.JSONDecodeError):
+        except (KeyError, json.JSONDecodeError):
             pass
     return None
 
@@ -143,6 +166,8 @@ async def _fetch_php(url: str) -> Optional[Song]:
     result = await fetch_data_from_url(url, "text")
 
     if result is not None:
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(result, "html.parser")
         playing = soup.get_text().strip()
         try:
@@ -167,6 +192,8 @@ async def _fetch_grm(url: str) -> Optional[Song]:
     """Fetches currently playing song and artist from Grupo Renascença Multimédia"""
     result = await fetch_data_from_url(url, "text")
     if result is not None:
+        import xmltodict
+
         try:
             parsed_data = xmltodict.parse(result)
             table = parsed_data.get("music", {}).get("song")
@@ -196,6 +223,8 @@ async def fetch_sbsr() -> Optional[Song]:
     """Fetches currently playing song and artist from SBSR"""
     result = await fetch_data_from_url(URL_SBSR, "text")
     if result is not None:
+        import xmltodict
+
         try:
             parsed_data = xmltodict.parse(result)
             current = parsed_data.get("BroadcastMonitor", {}).get("Current")
@@ -0,0 +1,47 @@
+""" Compact in-memory history of the last plays of a radio """
+
+from array import array
+from typing import Iterator
+import sys
+
+
+class PlayHistory:
+    """Fixed-size ring buffer of (timestamp, title, artist) plays
+
+    Timestamps are stored as integer seconds in an array and titles and
+    artists are interned, so identical strings are shared between all
+    radios. At 500 entries a buffer takes roughly 12 kB.
+    """
+
+    __slots__ = ("size", "_times", "_titles", "_artists", "_next", "_count")
+
+    def __init__(self, size: int = 500) -> None:
+        self.size = size
+        self._times = array("q", bytes(8 * size))
+        self._titles: list[str] = [""] * size
+        self._artists: list[str] = [""] * size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, when: float, title: str, artist: str) -> None:
+        index = self._next
+        self._times[index] = int(when)
+        self._titles[index] = sys.intern(title)
+        self._artists[index] = sys.intern(artist)
+        self._next = (index + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def __iter__(self) -> Iterator[tuple[int, str, str]]:
+        """Iterates from the most recent play to the oldest"""
+        for offset in range(1, self._count + 1):
+            index = (self._next - offset) % self.size
+            yield self._times[index], self._titles[index], self._artists[index]
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        return [
+            {"time": when, "title": title, "artist": artist}
+            for _, (when, title, artist) in zip(range(limit), self)
+        ]
@@ -0,0 +1,73 @@
+""" Canonical track keys, so cosmetic feed differences are not song changes """
+
+from functools import lru_cache
+import re
+import sys
+import unicodedata
+
+# "Song (feat. Other)" or "Song feat. Other" in titles; the bare word
+# does not count there, so "Left Ft Right" stays one title
+_TITLE_FEATURING = re.compile(
+    r"(?<=\S)\s*[\(\[]\s*(?:feat|ft|featuring)\b\.?(.*)$"
+    r"|(?<=\S)\s+(?:feat\.|ft\.|featuring)\s+(.*)$"
+)
+# "Artist feat. Other" or "Artist ft Other"
+_ARTIST_FEATURING = re.compile(
+    r"(?<=\S)\s*[\(\[]\s*(?:feat|ft|featuring)\b\.?(.*)$"
+    r"|(?<=\S)\s+(?:feat|ft|featuring)\b\.?\s+(.*)$"
+)
+_VERSIONS = r"(?:radio edit|edit|radio version|single version|remaster(?:ed)?)"
+# "Song (Radio Edit)", "Song [2011 Remaster]", or a dash suffix made only
+# of the version, as in "Song - Remastered 2011" or "Song - 2011 Remaster"
+_VERSION = re.compile(
+    rf"\s*[\(\[][^\)\]]*\b{_VERSIONS}\b[^\)\]]*[\)\]]"
+    rf"|\s+-\s+(?:\d{{4}}\s+)?{_VERSIONS}(?:\s+\d{{4}})?(?:\s+version)?\s*$"
+)
+# Words only separate artists between spaces, so "Malcolm X" stays whole
+_SEPARATORS = re.compile(r"\s*(?:,|&|;|/|\||\+)\s*|\s+(?:x|e|and|vs\.?)\s+")
+_APOSTROPHES = re.compile(r"['’`]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def _fold(text: str) -> str:
+    """Lowercases and strips accents"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _clean(text: str) -> str:
+    text = _APOSTROPHES.sub("", text)
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+
+
+def _split_featuring(pattern: re.Pattern, text: str) -> tuple[str, str]:
+    """Splits "Name (feat. Other)" into ("Name", "Other")"""
+    match = pattern.search(text)
+    if match is None:
+        return text, ""
+    return text[: match.start()], match.group(1) or match.group(2)
+
+
+@lru_cache(maxsize=4096)
+def track_key(title: str, artist: str) -> str:
+    """Returns an interned key that is the same for every spelling of a track
+
+    Accents, case, punctuation, "radio edit" or "remastered" suffixes (in
+    brackets or after a dash) and the order and separators of the artists
+    are ignored. Featured artists count as artists, whether they appear in
+    the title or in the artist field.
+    """
+    title, title_featuring = _split_featuring(
+        _TITLE_FEATURING, _VERSION.sub("", _fold(title))
+    )
+    artist, artist_featuring = _split_featuring(_ARTIST_FEATURING, _fold(artist))
+
+    names = {
+        _clean(name)
+        for part in (artist, artist_featuring, title_featuring)
+        for name in _SEPARATORS.split(part.strip())
+    }
+    artists = sorted(names - {""})
+
+    return sys.intern(f"{' & '.join(artists)} - {_clean(title)}")
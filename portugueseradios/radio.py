@@ -1,11 +1,35 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 import asyncio
+import json
+import os
 from logging import getLogger
+from time import perf_counter
+from urllib.parse import urlparse
 from typing import Optional, Callable
+from .artwork import ArtworkCache
 from .spotify import SpotifySong
+from .stats import PlayStats
+from .history import PlayHistory
+from .timing import StageTimings
+from .urls import (
+    URL_ANTENA1,
+    URL_ANTENA3,
+    URL_CIDADEFM,
+    URL_COMERCIAL,
+    URL_FUTURA,
+    URL_M80,
+    URL_MEGAHITS,
+    URL_OXIGENIO,
+    URL_RADAR,
+    URL_RENASCENCA,
+    URL_RFM,
+    URL_SBSR,
+    URL_SMOOTH,
+)
 from .fetch_radio import (
     Song,
+    network_time,
     fetch_antena1,
     fetch_antena3,
     fetch_comercial,
@@ -23,6 +47,23 @@ from .fetch_radio import (
 
 logger = getLogger(__name__)
 
+# Upstream feed of each fetch function, used to group requests by host
+_FEED_URLS = {
+    fetch_antena1: URL_ANTENA1,
+    fetch_antena3: URL_ANTENA3,
+    fetch_cidadefm: URL_CIDADEFM,
+    fetch_comercial: URL_COMERCIAL,
+    fetch_futura: URL_FUTURA,
+    fetch_m80: URL_M80,
+    fetch_megahits: URL_MEGAHITS,
+    fetch_oxigenio: URL_OXIGENIO,
+    fetch_radar: URL_RADAR,
+    fetch_renascenca: URL_RENASCENCA,
+    fetch_rfm: URL_RFM,
+    fetch_sbsr: URL_SBSR,
+    fetch_smooth: URL_SMOOTH,
+}
+
 
 @dataclass
 class Radio:
@@ -35,27 +76,122 @@ class Radio:
     last_song: Optional[Song] = None
     current_song: Optional[SpotifySong] = None
     last_update: Optional[datetime] = None
+    stats: Optional[PlayStats] = None
+    history: PlayHistory = field(default_factory=PlayHistory, repr=False)
+    timings: StageTimings = field(default_factory=StageTimings, repr=False)
+    host: str = ""
+    artwork: Optional[ArtworkCache] = field(default=None, repr=False)
 
     async def fetch(self) -> bool:
-        song = await self.fetch_function()
-        if song is not None and song != self.last_song:
+        start = perf_counter()
+        token = network_time.set([0.0])
+        try:
+            song = await self.fetch_function()
+        finally:
+            network = network_time.get()[0]
+            network_time.reset(token)
+        self.timings.record("fetch", network)
+        self.timings.record("parse", perf_counter() - start - network)
+
+        if song is not None and (
+            self.last_song is None or song.key != self.last_song.key
+        ):
             self.last_song = song
             self.last_update = datetime.now()
-            self.current_song = SpotifySong.from_search(song.title, song.artist)
+            self.history.append(self.last_update.timestamp(), song.title, song.artist)
+            if self.stats is not None:
+                self.stats.record(
+                    self.name,
+                    song.key,
+                    song.title,
+                    song.artist,
+                    self.last_update.timestamp(),
+                )
+            start = perf_counter()
+            try:
+                self.current_song = await asyncio.to_thread(
+                    SpotifySong.from_search, song.title, song.artist
+                )
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Spotify search failed for %s", song)
+                self.current_song = SpotifySong(song.title, song.artist)
+            self.timings.record("resolve", perf_counter() - start)
+            if self.artwork is not None:
+                # Starts the download while the update is still queued
+                self.artwork.submit(self.current_song.image_url)
             return True
         return False
 
+    async def poll_once(self, queue: asyncio.Queue) -> None:
+        updated = await self.fetch()
+        if updated:
+            await queue.put(self)
+        self.timings.cycle_done()
+
     async def poll(self, interval: int, queue: asyncio.Queue):
         while True:
-            updated = await self.fetch()
-            if updated:
-                await queue.put(self)
+            await self.poll_once(queue)
             # print(f"Updated {self.name}")
             await asyncio.sleep(interval)
 
+    def to_snapshot(self) -> dict:
+        """Serializes the last known state of the radio"""
+        return {
+            "last_song": asdict(self.last_song) if self.last_song else None,
+            "current_song": asdict(self.current_song) if self.current_song else None,
+            "last_update": self.last_update.isoformat() if self.last_update else None,
+        }
+
+    def restore_snapshot(self, data: dict) -> None:
+        """Restores the state saved by `to_snapshot`, all of it or nothing"""
+        last_song = Song(**data["last_song"]) if data.get("last_song") else None
+        current_song = (
+            SpotifySong(**data["current_song"]) if data.get("current_song") else None
+        )
+        last_update = (
+            datetime.fromisoformat(data["last_update"])
+            if data.get("last_update")
+            else None
+        )
+        self.last_song = last_song or self.last_song
+        self.current_song = current_song or self.current_song
+        self.last_update = last_update or self.last_update
+
+
+def save_snapshot(radios: list[Radio], path: str) -> None:
+    """Writes the state of every radio to `path`, atomically"""
+    data = {radio.name: radio.to_snapshot() for radio in radios}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(radios: list[Radio], path: str) -> None:
+    """Restores the state of each radio from `path`, if it exists"""
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        logger.info("No usable snapshot at %s", path)
+        return
+    if not isinstance(data, dict):
+        logger.warning("Ignoring malformed snapshot at %s", path)
+        return
+
+    for radio in radios:
+        state = data.get(radio.name, {})
+        if not isinstance(state, dict):
+            logger.warning("Ignoring malformed snapshot for %s", radio.name)
+            continue
+        try:
+            radio.restore_snapshot(state)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed snapshot for %s", radio.name)
+
 
-def available_radios() -> list[Radio]:
-    return [
+def available_radios(stats: Optional[PlayStats] = None) -> list[Radio]:
+    radios = [
         Radio("Antena1", "", "images/antena1.webp", fetch_antena1),
         Radio(
             "Antena3",
@@ -80,6 +216,10 @@ def available_radios() -> list[Radio]:
         Radio("SBSR", "https://sbsr.fm", "images/sbsr.png", fetch_sbsr),
         Radio("Smooth", "https://smoothfm.pt/", "images/smoothfm.svg", fetch_smooth),
     ]
+    for radio in radios:
+        radio.stats = stats
+        radio.host = urlparse(_FEED_URLS[radio.fetch_function]).netloc
+    return radios
 
     # return {
     #     "antena1": Radio("Antena1", "", "", fetch_antena1),
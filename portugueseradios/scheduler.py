@@ -0,0 +1,167 @@
+""" Polls every radio from a single timer instead of one task per radio """
+
+from collections import defaultdict
+from logging import getLogger
+from typing import Optional
+import asyncio
+import heapq
+import itertools
+import math
+import time
+
+from .radio import Radio
+
+logger = getLogger(__name__)
+
+
+class BatchPoller:
+    """Schedules all radios on one heap of due times
+
+    Due times are rounded up to multiples of `tick`, so radios that fall
+    due close together are woken by the same timer. On each tick the due
+    radios are grouped by upstream host and polled as one concurrent
+    batch, with at most `max_in_flight` requests overall and
+    `max_per_host` per host. A radio whose poll fails, or takes longer
+    than `poll_timeout`, is retried after an exponential backoff instead
+    of its normal interval.
+    """
+
+    def __init__(
+        self,
+        radios: list[Radio],
+        interval: float,
+        queue: asyncio.Queue,
+        tick: float = 1,
+        max_in_flight: int = 32,
+        max_per_host: int = 4,
+        max_backoff: float = 300,
+        poll_timeout: float = 30,
+    ) -> None:
+        self.radios = radios
+        self.interval = interval
+        self.queue = queue
+        self.tick = tick
+        self.poll_timeout = poll_timeout
+        self.max_backoff = max_backoff
+        self.max_per_host = max_per_host
+        self.wakeups = 0
+        self.failures: dict[str, int] = {radio.name: 0 for radio in radios}
+        self.last_error: dict[str, Optional[str]] = {
+            radio.name: None for radio in radios
+        }
+        # Failures in a row, which set the backoff
+        self._consecutive: dict[str, int] = {radio.name: 0 for radio in radios}
+        self._heap: list[tuple[float, int, Radio]] = []
+        self._order = itertools.count()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._batches: set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    def _schedule(
+        self, radio: Radio, delay: float, since: Optional[float] = None
+    ) -> None:
+        """Schedules `radio` `delay` seconds after `since`, or after now"""
+        now = asyncio.get_running_loop().time()
+        due = max(now, (now if since is None else since) + delay)
+        due = math.ceil(due / self.tick) * self.tick
+        entry = (due, next(self._order), radio)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            # The timer is set for a later radio, wake up earlier
+            self._wake.set()
+
+    def start(self) -> None:
+        for radio in self.radios:
+            self._schedule(radio, 0)
+        self._task = asyncio.create_task(self._run(), name="batch-poller")
+
+    async def stop(self) -> None:
+        tasks = list(self._batches)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._batches.clear()
+        self._heap.clear()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wake.clear()
+            timer = None
+            if self._heap:
+                timer = loop.call_at(self._heap[0][0], self._wake.set)
+            await self._wake.wait()
+            if timer is not None:
+                timer.cancel()
+            self.wakeups += 1
+
+            now = loop.time()
+            by_host: dict[str, list[tuple[Radio, float]]] = defaultdict(list)
+            while self._heap and self._heap[0][0] <= now:
+                due, _, radio = heapq.heappop(self._heap)
+                by_host[radio.host or radio.name].append((radio, due))
+
+            if by_host:
+                batch = asyncio.create_task(self._dispatch(by_host))
+                self._batches.add(batch)
+                batch.add_done_callback(self._batches.discard)
+
+    async def _dispatch(self, by_host: dict[str, list[tuple[Radio, float]]]) -> None:
+        await asyncio.gather(
+            *(
+                self._poll(host, radio, due)
+                for host, radios in by_host.items()
+                for radio, due in radios
+            )
+        )
+
+    async def _poll(self, host: str, radio: Radio, due: float) -> None:
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+        try:
+            async with self._hosts[host], self._in_flight:
+                # A poll that never returns would keep the radio off the
+                # heap and hold its host's slot for good
+                await asyncio.wait_for(radio.poll_once(self.queue), self.poll_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.error("Polling %s timed out", radio.name)
+            self._failed(radio, f"timed out after {self.poll_timeout}s")
+        except Exception as error:  # pylint: disable=broad-except
+            logger.exception("Polling %s failed", radio.name)
+            self._failed(radio, repr(error))
+        else:
+            self._consecutive[radio.name] = 0
+            # Counting from the slot it was due in keeps the radio in step
+            # with the others polled in that slot
+            self._schedule(radio, self.interval, due)
+
+    def _failed(self, radio: Radio, error: str) -> None:
+        """Records a failed poll and retries it after a backoff"""
+        self.failures[radio.name] += 1
+        self.last_error[radio.name] = error
+        self._consecutive[radio.name] += 1
+        backoff = min(2 ** self._consecutive[radio.name], self.max_backoff)
+        self._schedule(radio, max(backoff, self.interval))
+
+    def status(self) -> dict:
+        """Timings and health of every radio"""
+        now = time.time()
+        running = self._task is not None and not self._task.done()
+        return {
+            radio.name: {
+                **radio.timings.as_dict(),
+                "running": running,
+                "stale": radio.timings.last_cycle is None
+                or now - radio.timings.last_cycle > 3 * self.interval,
+                "failures": self.failures[radio.name],
+                "last_error": self.last_error[radio.name],
+            }
+            for radio in self.radios
+        }
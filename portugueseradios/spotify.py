@@ -1,10 +1,38 @@
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import cache
+from threading import Lock
 from typing import Optional
 
-from dotenv import load_dotenv
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from pprint import pprint
+from .normalize import track_key
+
+_SEARCH_CACHE_SIZE = 1024
+_search_cache: OrderedDict[str, Optional["SpotifySong"]] = OrderedDict()
+_search_lock = Lock()
+
+
+@cache
+def _client():
+    """Builds the Spotify client on first use and reuses it afterwards"""
+    from dotenv import load_dotenv
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+
+    load_dotenv()
+    return spotipy.Spotify(auth_manager=SpotifyOAuth())
+
+
+def _small_image(images: list[dict]) -> str:
+    """Picks the smallest album image that is still at least 300px wide,
+    instead of the full-size original Spotify lists first"""
+    if not images:
+        return ""
+    large_enough = [image for image in images if (image.get("width") or 0) >= 300]
+    if not large_enough:
+        # Spotify lists images from largest to smallest
+        return images[-1]["url"]
+    return min(large_enough, key=lambda image: image["width"])["url"]
+
 
 @dataclass
 class SpotifySong:
@@ -15,11 +43,22 @@ class SpotifySong:
 
     @classmethod
     def from_search(cls, title: str, artist: str) -> Optional["SpotifySong"]:
-        load_dotenv()
-        auth_manager = SpotifyOAuth()
-        sp = spotipy.Spotify(auth_manager=auth_manager)
+        key = track_key(title, artist)
+        with _search_lock:
+            if key in _search_cache:
+                _search_cache.move_to_end(key)
+                return _search_cache[key]
 
-        results = sp.search(q=f"track:{title} artist:{artist}", type="track")
+        song = cls._search(title, artist)
+        with _search_lock:
+            _search_cache[key] = song
+            if len(_search_cache) > _SEARCH_CACHE_SIZE:
+                _search_cache.popitem(last=False)
+        return song
+
+    @classmethod
+    def _search(cls, title: str, artist: str) -> Optional["SpotifySong"]:
+        results = _client().search(q=f"track:{title} artist:{artist}", type="track")
         tracks = results.get("tracks", {}).get("items")
 
         if tracks is not None and tracks:
@@ -27,7 +66,7 @@ class SpotifySong:
 
             title = track["name"]
             artists = " | ".join(artist["name"] for artist in track["artists"])
-            image = track["album"]["images"][0]["url"]
+            image = _small_image(track["album"]["images"])
             url = track["external_urls"]["spotify"]
 
             return cls(title, artists, image, url)
@@ -0,0 +1,205 @@
+""" Incremental play statistics across radio stations """
+
+from collections import Counter, deque
+from typing import Hashable, Optional
+import heapq
+import time
+
+WINDOWS = {"1h": 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch keeping at most `capacity` counters"""
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.capacity = capacity
+        self.counts: dict[Hashable, int] = {}
+
+    def add(self, key: Hashable) -> Optional[Hashable]:
+        """Counts `key`, returning the key it evicted, if any"""
+        if key in self.counts:
+            self.counts[key] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = 1
+        else:
+            smallest = min(self.counts, key=self.counts.__getitem__)
+            self.counts[key] = self.counts.pop(smallest) + 1
+            return smallest
+        return None
+
+    def top(self, n: int) -> list[tuple[Hashable, int]]:
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+
+class WindowCounter:
+    """Counts plays per station and track over a sliding time window"""
+
+    def __init__(self, length: float) -> None:
+        self.length = length
+        self.events: deque[tuple[float, str, Hashable]] = deque()
+        self.by_station: dict[str, Counter] = {}
+        self.overall: Counter = Counter()
+
+    def add(self, when: float, station: str, key: Hashable) -> None:
+        self.events.append((when, station, key))
+        self.by_station.setdefault(station, Counter())[key] += 1
+        self.overall[key] += 1
+
+    def expire(self, now: float) -> list[tuple[float, str, Hashable]]:
+        """Drops the plays that left the window, returning them"""
+        cutoff = now - self.length
+        expired = []
+        while self.events and self.events[0][0] < cutoff:
+            event = self.events.popleft()
+            _, station, key = event
+            for counter in (self.by_station[station], self.overall):
+                counter[key] -= 1
+                if counter[key] <= 0:
+                    del counter[key]
+            expired.append(event)
+        return expired
+
+
+class PlayStats:
+    """Keeps top tracks, rotation and cross-station overlap up to date as
+    songs change, so that reading them never rescans the play history
+
+    Everything except the heavy-hitter sketch only covers the longest
+    window, so memory stays bounded however many tracks go by.
+    """
+
+    def __init__(
+        self,
+        top_n: int = 10,
+        overlap_minutes: float = 30,
+        max_overlaps: int = 100,
+        min_repeats: int = 2,
+    ) -> None:
+        self.top_n = top_n
+        self.overlap_seconds = overlap_minutes * 60
+        self.min_repeats = min_repeats
+        self.windows = {name: WindowCounter(length) for name, length in WINDOWS.items()}
+        self.longest = self.windows[max(WINDOWS, key=WINDOWS.__getitem__)]
+        self.all_time = SpaceSaving()
+        self.labels: dict[Hashable, dict[str, str]] = {}
+        # Last play of each track on each station, kept for `overlap_seconds`
+        self.last_played: dict[Hashable, dict[str, float]] = {}
+        self._recent: deque[tuple[float, str, Hashable]] = deque()
+        # Times each station played each track within the longest window
+        self.rotation: dict[tuple[str, Hashable], deque[float]] = {}
+        self.overlaps: deque[dict] = deque(maxlen=max_overlaps)
+        self._cached: Optional[dict] = None
+        self._cached_at = 0.0
+
+    def record(
+        self, station: str, key: Hashable, title: str, artist: str, when: float
+    ) -> None:
+        """Registers that `station` started playing the track `key`"""
+        self._expire(when)
+        self.labels[key] = {"title": title, "artist": artist}
+        for window in self.windows.values():
+            window.add(when, station, key)
+        evicted = self.all_time.add(key)
+        if evicted is not None:
+            self._forget(evicted)
+
+        self.rotation.setdefault((station, key), deque()).append(when)
+
+        plays = self.last_played.setdefault(key, {})
+        for other, played_at in plays.items():
+            if other != station and when - played_at <= self.overlap_seconds:
+                self.overlaps.appendleft(
+                    {
+                        **self.labels[key],
+                        "stations": [other, station],
+                        "minutes_apart": round((when - played_at) / 60, 1),
+                        "at": when,
+                    }
+                )
+        plays[station] = when
+        self._recent.append((when, station, key))
+        self._cached = None
+
+    def _expire(self, now: float) -> None:
+        """Drops everything that fell out of the windows"""
+        for window in self.windows.values():
+            expired = window.expire(now)
+            if window is not self.longest:
+                continue
+            for _, station, key in expired:
+                times = self.rotation[(station, key)]
+                times.popleft()
+                if not times:
+                    del self.rotation[(station, key)]
+                self._forget(key)
+
+        cutoff = now - self.overlap_seconds
+        while self._recent and self._recent[0][0] < cutoff:
+            played_at, station, key = self._recent.popleft()
+            plays = self.last_played.get(key, {})
+            if plays.get(station) == played_at:
+                del plays[station]
+                if not plays:
+                    del self.last_played[key]
+
+    def _forget(self, key: Hashable) -> None:
+        """Drops the label of a track no window or sketch refers to"""
+        if key not in self.longest.overall and key not in self.all_time.counts:
+            self.labels.pop(key, None)
+
+    def _top(self, counter: Counter) -> list[dict]:
+        return [
+            {**self.labels[key], "plays": plays}
+            for key, plays in heapq.nlargest(
+                self.top_n, counter.items(), key=lambda item: item[1]
+            )
+        ]
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        """Returns the current statistics, recomputing only after changes
+        or once a minute so windows keep sliding without new plays"""
+        now = time.time() if now is None else now
+        if self._cached is not None and now - self._cached_at < 60:
+            return self._cached
+
+        self._expire(now)
+        top = {}
+        for name, window in self.windows.items():
+            top[name] = {
+                "overall": self._top(window.overall),
+                "stations": {
+                    station: self._top(counter)
+                    for station, counter in window.by_station.items()
+                    if counter
+                },
+            }
+
+        rotation: dict[str, list[dict]] = {}
+        for (station, key), times in self.rotation.items():
+            repeats = len(times) - 1
+            if repeats < self.min_repeats:
+                continue
+            rotation.setdefault(station, []).append(
+                {
+                    **self.labels[key],
+                    "repeats": repeats,
+                    "mean_minutes_between": round(
+                        (times[-1] - times[0]) / repeats / 60, 1
+                    ),
+                }
+            )
+        for station, tracks in rotation.items():
+            tracks.sort(key=lambda track: track["mean_minutes_between"])
+            del tracks[self.top_n :]
+
+        self._cached = {
+            "top": top,
+            "all_time": [
+                {**self.labels[key], "plays": plays}
+                for key, plays in self.all_time.top(self.top_n)
+            ],
+            "rotation": rotation,
+            "overlaps": list(self.overlaps),
+        }
+        self._cached_at = now
+        return self._cached
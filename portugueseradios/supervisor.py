@@ -0,0 +1,82 @@
+""" Keeps one polling task per radio alive and restarts it when it crashes """
+
+from logging import getLogger
+from typing import Optional
+import asyncio
+import time
+
+from .radio import Radio
+
+logger = getLogger(__name__)
+
+
+class Supervisor:
+    """Runs `Radio.poll` for every radio, restarting crashed pollers with
+    exponential backoff and cancelling all of them on `stop`"""
+
+    def __init__(
+        self,
+        radios: list[Radio],
+        interval: int,
+        queue: asyncio.Queue,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+    ) -> None:
+        self.radios = radios
+        self.interval = interval
+        self.queue = queue
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.restarts: dict[str, int] = {radio.name: 0 for radio in radios}
+        self.last_error: dict[str, Optional[str]] = {
+            radio.name: None for radio in radios
+        }
+
+    def start(self) -> None:
+        for radio in self.radios:
+            self.tasks[radio.name] = asyncio.create_task(
+                self._supervise(radio), name=f"poll-{radio.name}"
+            )
+
+    async def stop(self) -> None:
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks.clear()
+
+    async def _supervise(self, radio: Radio) -> None:
+        backoff = self.min_backoff
+        while True:
+            started = time.monotonic()
+            try:
+                await radio.poll(self.interval, self.queue)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:  # pylint: disable=broad-except
+                logger.exception("Poller for %s crashed", radio.name)
+                self.restarts[radio.name] += 1
+                self.last_error[radio.name] = repr(error)
+
+            # A poller that ran for a while before failing starts over
+            # from the shortest backoff
+            if time.monotonic() - started > self.max_backoff:
+                backoff = self.min_backoff
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def status(self) -> dict:
+        """Timings and health of every poller"""
+        now = time.time()
+        status = {}
+        for radio in self.radios:
+            last_cycle = radio.timings.last_cycle
+            status[radio.name] = {
+                **radio.timings.as_dict(),
+                "running": radio.name in self.tasks
+                and not self.tasks[radio.name].done(),
+                "stale": last_cycle is None or now - last_cycle > 3 * self.interval,
+                "restarts": self.restarts[radio.name],
+                "last_error": self.last_error[radio.name],
+            }
+        return status
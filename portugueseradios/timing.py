@@ -0,0 +1,48 @@
+""" Per-stage timing of radio poll cycles """
+
+from typing import Optional
+import time
+
+STAGES = ("fetch", "parse", "resolve", "publish")
+
+
+class StageTimings:
+    """Keeps the last, mean and maximum duration of each poll stage"""
+
+    __slots__ = ("last", "total", "max", "count", "cycles", "last_cycle")
+
+    def __init__(self) -> None:
+        self.last = dict.fromkeys(STAGES, 0.0)
+        self.total = dict.fromkeys(STAGES, 0.0)
+        self.max = dict.fromkeys(STAGES, 0.0)
+        self.count = dict.fromkeys(STAGES, 0)
+        self.cycles = 0
+        self.last_cycle: Optional[float] = None
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.last[stage] = seconds
+        self.total[stage] += seconds
+        self.max[stage] = max(self.max[stage], seconds)
+        self.count[stage] += 1
+
+    def cycle_done(self) -> None:
+        self.cycles += 1
+        self.last_cycle = time.time()
+
+    def as_dict(self) -> dict:
+        return {
+            "cycles": self.cycles,
+            "last_cycle": self.last_cycle,
+            "stages": {
+                stage: {
+                    "last_ms": round(self.last[stage] * 1000, 1),
+                    "mean_ms": round(
+                        self.total[stage] / self.count[stage] * 1000, 1
+                    )
+                    if self.count[stage]
+                    else 0.0,
+                    "max_ms": round(self.max[stage] * 1000, 1),
+                }
+                for stage in STAGES
+            },
+        }
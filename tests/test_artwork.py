@@ -0,0 +1,130 @@
+""" Tests the artwork cache against a local stand-in image server """
+
+from io import BytesIO
+from tempfile import TemporaryDirectory
+import unittest
+
+from aiohttp import web
+from PIL import Image
+
+from portugueseradios.artwork import ArtworkCache
+
+
+def _png(color: str, size: int = 640) -> bytes:
+    """An image as large as the originals Spotify serves"""
+    output = BytesIO()
+    Image.new("RGB", (size, size), color).save(output, "PNG")
+    return output.getvalue()
+
+
+class ArtworkCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.requests: list[str] = []
+        # The same picture behind every URL, so all thumbnails weigh the same
+        self.images = dict.fromkeys(("red", "green", "blue"), _png("red"))
+
+        async def image(request: web.Request) -> web.Response:
+            name = request.match_info["name"]
+            self.requests.append(name)
+            if name not in self.images:
+                raise web.HTTPNotFound()
+            return web.Response(body=self.images[name], content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/{name}.png", image)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+
+        self.directory = TemporaryDirectory()
+
+    async def asyncTearDown(self) -> None:
+        await self.runner.cleanup()
+        self.directory.cleanup()
+
+    def url(self, name: str) -> str:
+        return f"{self.base}/{name}.png"
+
+    async def test_downloads_and_resizes_once(self):
+        cache = ArtworkCache(self.directory.name, size=100)
+        cache.start()
+        try:
+            name = await cache.wait(self.url("red"), timeout=5)
+            self.assertIsNotNone(name)
+            with Image.open(cache.path(name)) as image:
+                self.assertEqual(image.size, (100, 100))
+
+            self.assertEqual(await cache.wait(self.url("red"), timeout=5), name)
+            self.assertEqual(self.requests, ["red"])
+        finally:
+            await cache.stop()
+
+    async def test_concurrent_submits_share_one_download(self):
+        cache = ArtworkCache(self.directory.name, size=100)
+        first = cache.submit(self.url("red"))
+        self.assertIs(cache.submit(self.url("red")), first)
+        cache.start()
+        try:
+            await cache.wait(self.url("red"), timeout=5)
+            self.assertEqual(self.requests, ["red"])
+        finally:
+            await cache.stop()
+
+    async def test_finds_thumbnails_after_restart(self):
+        cache = ArtworkCache(self.directory.name, size=100)
+        cache.start()
+        try:
+            name = await cache.wait(self.url("red"), timeout=5)
+        finally:
+            await cache.stop()
+
+        restarted = ArtworkCache(self.directory.name, size=100)
+        self.assertEqual(restarted.lookup(self.url("red")), name)
+        self.assertIsNone(restarted.submit(self.url("red")))
+        self.assertEqual(self.requests, ["red"])
+
+    async def test_evicts_least_recently_used(self):
+        cache = ArtworkCache(self.directory.name, size=100)
+        cache.start()
+        try:
+            await cache.wait(self.url("red"), timeout=5)
+            await cache.wait(self.url("green"), timeout=5)
+            cache.max_bytes = cache._total
+            self.assertIsNotNone(cache.lookup(self.url("red")))
+
+            await cache.wait(self.url("blue"), timeout=5)
+        finally:
+            await cache.stop()
+
+        self.assertIsNotNone(cache.lookup(self.url("red")))
+        self.assertIsNone(cache.lookup(self.url("green")))
+        self.assertIsNotNone(cache.lookup(self.url("blue")))
+        self.assertEqual(len(list(cache.directory.iterdir())), 2)
+
+    async def test_failed_urls_are_not_retried_until_retry_after(self):
+        self.images["broken"] = b"not an image"
+        cache = ArtworkCache(self.directory.name, size=100)
+        cache.start()
+        try:
+            self.assertIsNone(await cache.wait(self.url("missing"), timeout=5))
+            self.assertIsNone(await cache.wait(self.url("broken"), timeout=5))
+            self.assertIsNone(cache.submit(self.url("missing")))
+            self.assertIsNone(cache.submit(self.url("broken")))
+            self.assertEqual(self.requests, ["missing", "broken"])
+
+            cache.retry_after = 0
+            self.assertIsNotNone(cache.submit(self.url("missing")))
+        finally:
+            await cache.stop()
+
+    async def test_path_rejects_unknown_names(self):
+        cache = ArtworkCache(self.directory.name)
+        self.assertIsNone(cache.path("../pyproject.toml"))
+        self.assertIsNone(cache.path(f"{'0' * 32}.webp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
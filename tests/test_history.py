@@ -0,0 +1,57 @@
+""" Tests the recent-plays ring buffer """
+
+import unittest
+
+from portugueseradios.history import PlayHistory
+
+
+class PlayHistoryTest(unittest.TestCase):
+    def test_empty(self):
+        history = PlayHistory(3)
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.recent(), [])
+
+    def test_newest_first_before_wrapping(self):
+        history = PlayHistory(3)
+        history.append(1.9, "One", "A")
+        history.append(2, "Two", "B")
+        self.assertEqual(len(history), 2)
+        self.assertEqual(
+            history.recent(),
+            [
+                {"time": 2, "title": "Two", "artist": "B"},
+                {"time": 1, "title": "One", "artist": "A"},
+            ],
+        )
+
+    def test_wraparound_keeps_the_last_plays(self):
+        history = PlayHistory(3)
+        for n in range(7):
+            history.append(n, f"Title {n}", "Artist")
+        self.assertEqual(len(history), 3)
+        self.assertEqual([play[0] for play in history], [6, 5, 4])
+        self.assertEqual(
+            [play["title"] for play in history.recent()],
+            ["Title 6", "Title 5", "Title 4"],
+        )
+
+    def test_recent_limit(self):
+        history = PlayHistory(5)
+        for n in range(8):
+            history.append(n, f"Title {n}", "Artist")
+        self.assertEqual([play["time"] for play in history.recent(2)], [7, 6])
+        self.assertEqual(len(history.recent(0)), 0)
+        self.assertEqual(len(history.recent(100)), 5)
+
+    def test_strings_are_interned(self):
+        first, second = PlayHistory(2), PlayHistory(2)
+        first.append(0, "".join(["Ti", "tle"]), "".join(["Art", "ist"]))
+        second.append(0, "".join(["Tit", "le"]), "".join(["Ar", "tist"]))
+        ((_, first_title, first_artist),) = first
+        ((_, second_title, second_artist),) = second
+        self.assertIs(first_title, second_title)
+        self.assertIs(first_artist, second_artist)
+
+
+if __name__ == "__main__":
+    unittest.main()
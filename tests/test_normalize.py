@@ -0,0 +1,81 @@
+""" Tests the canonical track keys """
+
+import unittest
+
+from portugueseradios.normalize import track_key
+
+# Each group lists spellings of one track that must share a key
+SAME_TRACK = [
+    [
+        ("Bad Habits", "Ed Sheeran"),
+        ("BAD HABITS ", "ed  sheeran"),
+        ("Bad Habits (Radio Edit)", "Ed Sheeran"),
+        ("Bad Habits - Radio Edit", "Ed Sheeran"),
+    ],
+    [
+        ("Não Me Toca", "Anselmo Ralph"),
+        ("Nao me toca", "ANSELMO RALPH"),
+    ],
+    [
+        ("Don't Stop Me Now", "Queen"),
+        ("Dont Stop Me Now", "Queen"),
+        ("Don’t Stop Me Now - Remastered 2011", "Queen"),
+        ("Don't Stop Me Now - 2011 Remaster", "Queen"),
+        ("Don't Stop Me Now [Remastered]", "Queen"),
+    ],
+    [
+        ("Stay", "The Kid LAROI & Justin Bieber"),
+        ("Stay", "Justin Bieber, The Kid LAROI"),
+        ("Stay (feat. Justin Bieber)", "The Kid LAROI"),
+        ("Stay feat. Justin Bieber", "The Kid LAROI"),
+        ("Stay", "The Kid LAROI ft. Justin Bieber"),
+        ("Stay", "The Kid LAROI x Justin Bieber"),
+    ],
+    [
+        ("Under Pressure", "Queen/David Bowie"),
+        ("Under Pressure", "Queen e David Bowie"),
+        ("Under Pressure", "David Bowie and Queen"),
+    ],
+    [
+        ("Shadow", "Malcolm X"),
+        ("shadow", "MALCOLM X"),
+    ],
+]
+
+# Pairs of different tracks that must keep different keys
+DIFFERENT_TRACKS = [
+    (("Shadow", "Malcolm X"), ("Shadow", "Malcolm")),
+    (("Feat", "Someone"), ("Other Song", "Someone")),
+    (("Ft. Lauderdale", "Someone"), ("Miami", "Someone")),
+    (("Left Ft Right", "Someone"), ("Left", "Someone")),
+    (("Hello - From the Edit Suite", "Adele"), ("Hello", "Adele")),
+    (("Live - Forever", "Oasis"), ("Live", "Oasis")),
+    (("Stay With Me", "Sam Smith"), ("Stay", "Sam Smith")),
+    (("Without Me", "Eminem"), ("Me", "Eminem")),
+]
+
+
+class TrackKeyTest(unittest.TestCase):
+    def test_spellings_of_a_track_share_a_key(self):
+        for spellings in SAME_TRACK:
+            expected = track_key(*spellings[0])
+            for title, artist in spellings[1:]:
+                with self.subTest(title=title, artist=artist):
+                    self.assertEqual(track_key(title, artist), expected)
+
+    def test_different_tracks_keep_different_keys(self):
+        for first, second in DIFFERENT_TRACKS:
+            with self.subTest(first=first, second=second):
+                self.assertNotEqual(track_key(*first), track_key(*second))
+
+    def test_titles_are_never_emptied(self):
+        for title in ("Feat", "Ft. Lauderdale", "Featuring", "Edit"):
+            with self.subTest(title=title):
+                self.assertFalse(track_key(title, "Someone").endswith(" - "))
+
+    def test_keys_are_interned(self):
+        self.assertIs(track_key("Song", "A"), track_key(" song", "a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
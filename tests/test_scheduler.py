@@ -0,0 +1,93 @@
+""" Tests the batched poller """
+
+import asyncio
+import logging
+import unittest
+
+from portugueseradios.fetch_radio import Song
+from portugueseradios.radio import Radio
+from portugueseradios.scheduler import BatchPoller
+
+
+def _radio(name: str, fetch, host: str = "host") -> Radio:
+    # Starting from the song the fetchers return means no Spotify lookups
+    return Radio(name, "", "", fetch, last_song=Song("Title", "Artist"), host=host)
+
+
+async def _song() -> Song:
+    return Song("Title", "Artist")
+
+
+class BatchPollerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def run_poller(self, poller: BatchPoller, seconds: float) -> None:
+        poller.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await poller.stop()
+
+    async def test_polls_every_interval(self):
+        radios = [_radio("A", _song), _radio("B", _song, host="other")]
+        poller = BatchPoller(radios, 0.1, self.queue, tick=0.01)
+        await self.run_poller(poller, 0.55)
+
+        for radio in radios:
+            self.assertIn(radio.timings.cycles, range(5, 8))
+        self.assertFalse(any(status["stale"] for status in poller.status().values()))
+
+    async def test_failed_poll_is_retried_after_backoff(self):
+        calls = []
+
+        async def flaky() -> Song:
+            calls.append(asyncio.get_running_loop().time())
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return await _song()
+
+        radio = _radio("A", flaky)
+        poller = BatchPoller([radio], 0.05, self.queue, tick=0.01, max_backoff=0.2)
+        await self.run_poller(poller, 0.5)
+
+        status = poller.status()["A"]
+        self.assertEqual(status["failures"], 1)
+        self.assertEqual(status["last_error"], "RuntimeError('boom')")
+        self.assertGreater(radio.timings.cycles, 1)
+        # The retry waits for the backoff, not for the shorter interval
+        self.assertGreaterEqual(calls[1] - calls[0], 0.2 - 0.01)
+
+    async def test_hanging_poll_times_out_and_frees_its_host(self):
+        hangs = 0
+
+        async def hang() -> Song:
+            nonlocal hangs
+            hangs += 1
+            await asyncio.Event().wait()
+
+        stuck = _radio("Stuck", hang)
+        healthy = _radio("Healthy", _song)
+        poller = BatchPoller(
+            [stuck, healthy],
+            0.05,
+            self.queue,
+            tick=0.01,
+            max_per_host=1,
+            max_backoff=0.1,
+            poll_timeout=0.05,
+        )
+        await self.run_poller(poller, 0.6)
+
+        status = poller.status()
+        self.assertGreater(hangs, 1)
+        self.assertEqual(status["Stuck"]["last_error"], "timed out after 0.05s")
+        self.assertGreater(status["Stuck"]["failures"], 1)
+        self.assertTrue(status["Stuck"]["stale"])
+        self.assertGreater(healthy.timings.cycles, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+""" Tests the incremental play statistics """
+
+import unittest
+
+from portugueseradios.stats import PlayStats, SpaceSaving
+
+START = 1_000_000.0
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def _titles(tracks: list[dict]) -> list[str]:
+    return [track["title"] for track in tracks]
+
+
+class PlayStatsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stats = PlayStats(top_n=3)
+
+    def play(self, station: str, title: str, when: float) -> None:
+        self.stats.record(station, title, title, "Artist", when)
+
+    def test_windows_expire_old_plays(self):
+        self.play("A", "old", START)
+        self.play("A", "new", START + 2 * HOUR)
+        top = self.stats.snapshot(START + 2 * HOUR)["top"]
+
+        self.assertEqual(_titles(top["1h"]["overall"]), ["new"])
+        self.assertEqual(sorted(_titles(top["24h"]["overall"])), ["new", "old"])
+
+        top = self.stats.snapshot(START + 8 * DAY)["top"]
+        self.assertEqual(top["7d"], {"overall": [], "stations": {}})
+
+    def test_top_counts_per_station_and_overall(self):
+        for n in range(3):
+            self.play("A", "hit", START + n)
+        self.play("B", "hit", START + 10)
+        self.play("B", "other", START + 11)
+        top = self.stats.snapshot(START + 20)["top"]["1h"]
+
+        self.assertEqual(
+            top["overall"][0], {"title": "hit", "artist": "Artist", "plays": 4}
+        )
+        self.assertEqual(_titles(top["stations"]["A"]), ["hit"])
+        self.assertEqual(sorted(_titles(top["stations"]["B"])), ["hit", "other"])
+
+    def test_rotation_needs_repeats_within_the_week(self):
+        for n in range(3):
+            self.play("A", "rotated", START + n * HOUR)
+        self.play("A", "twice", START)
+        self.play("A", "twice", START + HOUR)
+        rotation = self.stats.snapshot(START + 3 * HOUR)["rotation"]
+
+        self.assertEqual(
+            rotation["A"],
+            [
+                {
+                    "title": "rotated",
+                    "artist": "Artist",
+                    "repeats": 2,
+                    "mean_minutes_between": 60.0,
+                }
+            ],
+        )
+
+        rotation = self.stats.snapshot(START + 8 * DAY)["rotation"]
+        self.assertEqual(rotation, {})
+        self.assertEqual(self.stats.rotation, {})
+
+    def test_overlaps_within_the_overlap_window(self):
+        self.play("A", "song", START)
+        self.play("B", "song", START + 10 * 60)
+        self.play("C", "song", START + 2 * HOUR)
+        overlaps = self.stats.snapshot(START + 2 * HOUR)["overlaps"]
+
+        self.assertEqual(len(overlaps), 1)
+        self.assertEqual(overlaps[0]["stations"], ["A", "B"])
+        self.assertEqual(overlaps[0]["minutes_apart"], 10.0)
+        self.assertEqual(list(self.stats.last_played), ["song"])
+
+    def test_labels_are_pruned_once_unreferenced(self):
+        self.stats.all_time = SpaceSaving(capacity=1)
+        self.play("A", "first", START)
+        self.play("A", "second", START + 1)
+        # "first" is still in the 7d window, though evicted from the sketch
+        self.assertIn("first", self.stats.labels)
+
+        self.play("A", "third", START + 8 * DAY)
+        self.assertEqual(set(self.stats.labels), {"third"})
+
+    def test_snapshot_is_cached_until_the_next_play(self):
+        self.play("A", "song", START)
+        first = self.stats.snapshot(START + 1)
+        self.assertIs(self.stats.snapshot(START + 2), first)
+        self.play("A", "other", START + 3)
+        self.assertIsNot(self.stats.snapshot(START + 4), first)
+
+
+class SpaceSavingTest(unittest.TestCase):
+    def test_keeps_heavy_hitters_in_bounded_space(self):
+        sketch = SpaceSaving(capacity=2)
+        for key in "aaaabbc":
+            sketch.add(key)
+        self.assertEqual(len(sketch.counts), 2)
+        self.assertEqual(sketch.top(1), [("a", 4)])
+
+
+if __name__ == "__main__":
+    unittest.main()